@@ -4,16 +4,53 @@ Validate phrase similarity for documentation examples.
 Compares phrase pairs to determine if they're true paraphrases vs. related-but-distinct concepts.
 """
 
+import argparse
 import numpy as np
 from sentence_transformers import SentenceTransformer
-from scipy.spatial.distance import cosine
 
-def compute_similarity(model, phrase1, phrase2):
-    """Compute cosine similarity between two phrases."""
-    embeddings = model.encode([phrase1, phrase2])
-    # cosine from scipy returns distance, so we convert to similarity
-    similarity = 1 - cosine(embeddings[0], embeddings[1])
-    return similarity
+MODEL_NAME = 'all-MiniLM-L6-v2'
+
+def load_model(precision):
+    """Load the embedding model at the requested precision.
+
+    fp16 halves weights and runs half-precision kernels on CUDA; int8 applies
+    PyTorch dynamic quantization to the Linear layers for faster CPU
+    inference. Both can shift scores slightly, so use fp32 when reproducing
+    the documented thresholds.
+    """
+    if precision == "fp32":
+        return SentenceTransformer(MODEL_NAME)
+
+    import torch
+
+    if precision == "fp16":
+        if not torch.cuda.is_available():
+            print("fp16 requires a CUDA device; falling back to fp32.\n")
+            return SentenceTransformer(MODEL_NAME)
+        model = SentenceTransformer(MODEL_NAME, device='cuda')
+        model.half()
+        return model
+
+    # int8: dynamic quantization runs on CPU
+    model = SentenceTransformer(MODEL_NAME, device='cpu')
+    model[0].auto_model = torch.quantization.quantize_dynamic(
+        model[0].auto_model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+    return model
+
+def compute_similarities(model, pairs):
+    """Compute cosine similarity for each phrase pair.
+
+    Every unique phrase is encoded once in a single batched call. With
+    normalized embeddings, cosine similarity is just the dot product.
+    """
+    unique_phrases = list(dict.fromkeys(p for pair in pairs for p in pair))
+    index = {phrase: i for i, phrase in enumerate(unique_phrases)}
+    embeddings = model.encode(unique_phrases, batch_size=32, normalize_embeddings=True)
+    return [
+        float(np.dot(embeddings[index[phrase1]], embeddings[index[phrase2]]))
+        for phrase1, phrase2 in pairs
+    ]
 
 def categorize_similarity(score):
     """Categorize similarity score."""
@@ -34,10 +71,19 @@ def explain_score(phrase1, phrase2, score, category):
     return explanations.get(category, "Unknown category")
 
 def main():
+    parser = argparse.ArgumentParser(description="Validate phrase similarity thresholds")
+    parser.add_argument(
+        "--precision",
+        choices=["fp32", "fp16", "int8"],
+        default="fp32",
+        help="Model precision: fp32 (reference), fp16 (CUDA) or int8 (CPU dynamic quantization)"
+    )
+    args = parser.parse_args()
+
     # Load pre-trained sentence embedding model
     # Using 'all-MiniLM-L6-v2' - fast, good quality, commonly used
-    print("Loading sentence embedding model (all-MiniLM-L6-v2)...\n")
-    model = SentenceTransformer('all-MiniLM-L6-v2')
+    print(f"Loading sentence embedding model ({MODEL_NAME}, {args.precision})...\n")
+    model = load_model(args.precision)
 
     # Define phrase pairs to test
     pairs = [
@@ -58,8 +104,9 @@ def main():
     print("=" * 80)
     print()
 
-    for i, (phrase1, phrase2) in enumerate(pairs, 1):
-        similarity = compute_similarity(model, phrase1, phrase2)
+    similarities = compute_similarities(model, pairs)
+
+    for i, ((phrase1, phrase2), similarity) in enumerate(zip(pairs, similarities), 1):
         category = categorize_similarity(similarity)
         explanation = explain_score(phrase1, phrase2, similarity, category)
 
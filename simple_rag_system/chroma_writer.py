@@ -0,0 +1,83 @@
+"""
+ChromaDB writer process used by ingest.py.
+
+collection.add() blocks on SQLite writes and HNSW index updates. Running
+it in a separate process lets the main process keep encoding the next
+batch meanwhile. The process is started with spawn, which re-imports the
+launching script (ingest.py, and with it sentence-transformers and torch)
+but does not load an embedding model; the writer itself only uses chromadb.
+
+The parent keeps its own PersistentClient on the same path while the
+writer runs. That is safe because the parent only creates the (empty)
+collection beforehand and does not touch it again until the writer has
+exited: the writer is the only process writing, and the parent loads the
+collection's vector index from disk on its first query afterwards.
+"""
+
+import queue
+import multiprocessing
+import chromadb
+
+import config
+
+# spawn, not fork: a forked child would inherit the parent's ChromaDB client
+# and model runtime threads
+_CONTEXT = multiprocessing.get_context("spawn")
+
+
+class ChromaWriterProcess(_CONTEXT.Process):
+    """
+    Add batches to a ChromaDB collection from a separate process.
+
+    The process opens its own PersistentClient on index_path. Batches are
+    dicts of collection.add() keyword arguments. Call put() for each
+    batch, then close() to flush the remaining batches and wait for the
+    process to exit, or abort() to stop it after an error.
+    """
+
+    def __init__(self, index_path: str):
+        super().__init__(name="chroma-writer", daemon=True)
+        self.index_path = index_path
+        # Bounded so the encoder stays at most two batches ahead of the writer
+        self.batches = _CONTEXT.Queue(maxsize=2)
+
+    def run(self):
+        client = chromadb.PersistentClient(path=self.index_path)
+        collection = client.get_collection(name=config.CHROMADB_COLLECTION_NAME)
+
+        error = None
+        while (batch := self.batches.get()) is not None:
+            if error is not None:
+                continue  # keep draining so the producer never blocks
+            try:
+                collection.add(**batch)
+            except Exception as e:
+                error = e
+
+        if error is not None:
+            raise error  # printed by multiprocessing; the exit code tells the parent
+
+    def put(self, batch: dict):
+        """Queue a batch for writing, failing if the process has died."""
+        while True:
+            try:
+                self.batches.put(batch, timeout=1)
+                return
+            except queue.Full:
+                if not self.is_alive():
+                    raise RuntimeError("ChromaDB writer process exited unexpectedly")
+
+    def abort(self):
+        """Stop the process without writing the remaining queued batches."""
+        self.terminate()
+        self.join()
+        # Batches still buffered for the dead process must not block our exit
+        self.batches.cancel_join_thread()
+
+    def close(self):
+        """Write any queued batches, wait for the process and check it succeeded."""
+        if self.is_alive():
+            self.put(None)
+        self.join()
+        if self.exitcode != 0:
+            raise RuntimeError(f"ChromaDB writer process failed (exit code {self.exitcode})")
@@ -9,24 +9,82 @@ Implements three chunking approaches:
 
 import re
 import tiktoken
+from functools import lru_cache
+from types import MappingProxyType
 from typing import List, Dict, Tuple
 import config
 
 
+# Section heading patterns, compiled once at import time. They run over the
+# whole document in MULTILINE mode, so the whitespace after the hashes must
+# not cross a line break.
+_H2_RE = re.compile(r'^##[^\S\n]+(.+)$', re.MULTILINE)
+_H3_RE = re.compile(r'^###[^\S\n]+(.+)$', re.MULTILINE)
+
+
+# Shared tiktoken encoding, loaded on first use. Encodings are immutable, so
+# one instance serves every chunker (and thread).
+_ENCODING = None
+
+
+def _get_encoding() -> tiktoken.Encoding:
+    """Return the module-wide tiktoken encoding for config.TIKTOKEN_ENCODING."""
+    global _ENCODING
+    if _ENCODING is None:
+        _ENCODING = tiktoken.get_encoding(config.TIKTOKEN_ENCODING)
+    return _ENCODING
+
+
+# Token counts and abstracts are pure functions of their inputs, and a corpus
+# often repeats the same section text (templates, boilerplate, re-runs), so
+# they are memoized at module level where the cache is shared by all chunkers.
+@lru_cache(maxsize=config.CHUNK_CACHE_SIZE)
+def _count_tokens_cached(text: str) -> int:
+    """Count tokens in text with the shared encoding."""
+    return len(_get_encoding().encode_ordinary(text))
+
+
+@lru_cache(maxsize=config.CHUNK_CACHE_SIZE)
+def _extractive_abstract_cached(content: str, max_tokens: int) -> str:
+    """Extract the first max_tokens tokens of content as an abstract."""
+    encoding = _get_encoding()
+    tokens = encoding.encode_ordinary(content)
+    abstract_tokens = tokens[:max_tokens]
+    abstract = encoding.decode(abstract_tokens)
+
+    # Try to end at sentence boundary
+    # Find last period, exclamation, or question mark
+    for char in ['. ', '! ', '? ']:
+        last_pos = abstract.rfind(char)
+        if last_pos > len(abstract) * 0.7:  # Only if we're close to the end
+            abstract = abstract[:last_pos + 1]
+            break
+
+    return abstract
+
+
 class Chunker:
     """Base chunker class with common utilities."""
 
     def __init__(self):
-        self.encoding = tiktoken.get_encoding(config.TIKTOKEN_ENCODING)
+        self.encoding = _get_encoding()
 
     def count_tokens(self, text: str) -> int:
-        """Count tokens in text using tiktoken."""
-        return len(self.encoding.encode(text))
+        """Count tokens in text using tiktoken (cached by text)."""
+        return _count_tokens_cached(text)
+
+    def count_tokens_batch(self, texts: List[str]) -> List[int]:
+        """Count tokens for several texts with a single tiktoken call."""
+        return [len(tokens) for tokens in self.encoding.encode_ordinary_batch(texts)]
 
     def chunk(self, content: str, metadata: Dict) -> List[Dict]:
         """
         Chunk content into semantic units.
         Returns list of chunk dicts with content and metadata.
+
+        Document metadata is attached to every chunk as a shared, read-only
+        view (MappingProxyType) under the "metadata" key rather than copied
+        into each chunk dict.
         """
         raise NotImplementedError("Subclass must implement chunk()")
 
@@ -54,12 +112,12 @@ class LayoutAwareChunker(Chunker):
         Returns:
             List of chunk dicts with content, metadata, and token count
         """
+        metadata = MappingProxyType(metadata)
         sections = self._split_by_h2(content)
+        section_tokens = self.count_tokens_batch([s["content"] for s in sections])
         chunks = []
 
-        for i, section in enumerate(sections):
-            token_count = self.count_tokens(section["content"])
-
+        for i, (section, token_count) in enumerate(zip(sections, section_tokens)):
             # Skip empty or very small sections
             if token_count < 50:
                 continue
@@ -67,15 +125,15 @@ class LayoutAwareChunker(Chunker):
             # If section is too large, split by H3
             if token_count > self.max_tokens:
                 subsections = self._split_by_h3(section["content"])
-                for j, subsection in enumerate(subsections):
-                    subtoken_count = self.count_tokens(subsection["content"])
+                subsection_tokens = self.count_tokens_batch([s["content"] for s in subsections])
+                for j, (subsection, subtoken_count) in enumerate(zip(subsections, subsection_tokens)):
                     chunks.append({
                         "content": subsection["content"],
                         "section_title": f"{section['title']} - {subsection['title']}",
                         "heading_level": "h3",
                         "tokens": subtoken_count,
                         "chunk_index": len(chunks),
-                        **metadata
+                        "metadata": metadata
                     })
             else:
                 chunks.append({
@@ -84,7 +142,7 @@ class LayoutAwareChunker(Chunker):
                     "heading_level": "h2",
                     "tokens": token_count,
                     "chunk_index": len(chunks),
-                    **metadata
+                    "metadata": metadata
                 })
 
         # Optionally merge small sections
@@ -95,65 +153,42 @@ class LayoutAwareChunker(Chunker):
 
     def _split_by_h2(self, content: str) -> List[Dict]:
         """Split content at H2 (##) boundaries."""
-        sections = []
-        lines = content.split('\n')
-        current_section = []
-        current_title = "Introduction"
-
-        for line in lines:
-            # Check for H2 header (## Title)
-            h2_match = re.match(r'^##\s+(.+)$', line)
-            if h2_match:
-                # Save previous section
-                if current_section:
-                    sections.append({
-                        "title": current_title,
-                        "content": '\n'.join(current_section).strip()
-                    })
-                # Start new section
-                current_title = h2_match.group(1)
-                current_section = [line]
-            else:
-                current_section.append(line)
-
-        # Save last section
-        if current_section:
-            sections.append({
-                "title": current_title,
-                "content": '\n'.join(current_section).strip()
-            })
-
-        return sections
+        return self._split_by_heading(content, _H2_RE, "Introduction")
 
     def _split_by_h3(self, content: str) -> List[Dict]:
         """Split content at H3 (###) boundaries."""
+        return self._split_by_heading(content, _H3_RE, "Section")
+
+    def _split_by_heading(self, content: str, heading_re: re.Pattern,
+                          default_title: str) -> List[Dict]:
+        """
+        Split content at lines matching heading_re.
+
+        Headings are located with a single MULTILINE scan and sections are
+        sliced straight out of content, so the document is never split into
+        a list of lines. Text before the first heading becomes a section
+        titled default_title.
+        """
         sections = []
-        lines = content.split('\n')
-        current_section = []
-        current_title = "Section"
-
-        for line in lines:
-            # Check for H3 header (### Title)
-            h3_match = re.match(r'^###\s+(.+)$', line)
-            if h3_match:
-                # Save previous section
-                if current_section:
-                    sections.append({
-                        "title": current_title,
-                        "content": '\n'.join(current_section).strip()
-                    })
-                # Start new section
-                current_title = h3_match.group(1)
-                current_section = [line]
-            else:
-                current_section.append(line)
+        current_title = default_title
+        current_start = 0
+
+        for heading in heading_re.finditer(content):
+            # Save previous section (nothing precedes a heading on line one)
+            if heading.start() > 0:
+                sections.append({
+                    "title": current_title,
+                    "content": content[current_start:heading.start()].strip()
+                })
+            # Start new section
+            current_title = heading.group(1)
+            current_start = heading.start()
 
         # Save last section
-        if current_section:
-            sections.append({
-                "title": current_title,
-                "content": '\n'.join(current_section).strip()
-            })
+        sections.append({
+            "title": current_title,
+            "content": content[current_start:].strip()
+        })
 
         return sections
 
@@ -195,6 +230,8 @@ class NaiveChunker(Chunker):
         super().__init__()
         self.chunk_size = config.NAIVE_CHUNK_SIZE
         self.overlap = config.NAIVE_OVERLAP
+        if self.overlap >= self.chunk_size:
+            raise ValueError("NAIVE_OVERLAP must be smaller than NAIVE_CHUNK_SIZE")
 
     def chunk(self, content: str, metadata: Dict) -> List[Dict]:
         """
@@ -207,33 +244,37 @@ class NaiveChunker(Chunker):
         Returns:
             List of chunk dicts
         """
+        metadata = MappingProxyType(metadata)
+
         # Tokenize entire content
         tokens = self.encoding.encode(content)
-        chunks = []
-        start = 0
 
-        while start < len(tokens):
-            # Get chunk of tokens
+        # Token windows: advance by chunk_size - overlap until the window
+        # reaches the end of the document
+        step = self.chunk_size - self.overlap
+        windows = []
+        for start in range(0, len(tokens), step):
             end = min(start + self.chunk_size, len(tokens))
-            chunk_tokens = tokens[start:end]
+            windows.append((start, end))
+            if end == len(tokens):
+                break
 
-            # Decode back to text
-            chunk_text = self.encoding.decode(chunk_tokens)
+        # Decode all windows back to text in a single tiktoken call
+        texts = self.encoding.decode_batch([tokens[start:end] for start, end in windows])
 
+        chunks = []
+        for (start, end), chunk_text in zip(windows, texts):
             chunks.append({
                 "content": chunk_text,
                 "section_title": f"Chunk {len(chunks) + 1}",
                 "heading_level": "none",
-                "tokens": len(chunk_tokens),
+                "tokens": end - start,
                 "chunk_index": len(chunks),
                 "start_token": start,
                 "end_token": end,
-                **metadata
+                "metadata": metadata
             })
 
-            # Move start forward with overlap
-            start = end - self.overlap
-
         return chunks
 
 
@@ -259,7 +300,11 @@ class AbstractFirstChunker(LayoutAwareChunker):
         # Then generate abstracts for each chunk
         for chunk in base_chunks:
             chunk["abstract"] = self._generate_abstract(chunk["content"])
-            chunk["abstract_tokens"] = self.count_tokens(chunk["abstract"])
+
+        # Count abstract tokens for all chunks in one tiktoken call
+        abstract_tokens = self.count_tokens_batch([chunk["abstract"] for chunk in base_chunks])
+        for chunk, token_count in zip(base_chunks, abstract_tokens):
+            chunk["abstract_tokens"] = token_count
 
         return base_chunks
 
@@ -277,20 +322,8 @@ class AbstractFirstChunker(LayoutAwareChunker):
             return self._extractive_abstract(content)
 
     def _extractive_abstract(self, content: str) -> str:
-        """Extract first N tokens as abstract."""
-        tokens = self.encoding.encode(content)
-        abstract_tokens = tokens[:self.abstract_max_tokens]
-        abstract = self.encoding.decode(abstract_tokens)
-
-        # Try to end at sentence boundary
-        # Find last period, exclamation, or question mark
-        for char in ['. ', '! ', '? ']:
-            last_pos = abstract.rfind(char)
-            if last_pos > len(abstract) * 0.7:  # Only if we're close to the end
-                abstract = abstract[:last_pos + 1]
-                break
-
-        return abstract
+        """Extract first N tokens as abstract (cached by content)."""
+        return _extractive_abstract_cached(content, self.abstract_max_tokens)
 
 
 def get_chunker(strategy: str = None) -> Chunker:
@@ -12,6 +12,12 @@ EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 # EMBEDDING_MODEL = "sentence-transformers/all-mpnet-base-v2"  # Better quality
 # EMBEDDING_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"  # Multilingual
 
+# Inference backend: torch (fp32 PyTorch) or onnx (ONNX Runtime, faster on CPU).
+# ONNX and fp16 change the vectors slightly: query an index with the settings it was built with.
+EMBEDDING_BACKEND = "torch"
+EMBEDDING_FP16 = False                  # Half precision on a CUDA GPU (torch backend only)
+ONNX_MODEL_FILE = "onnx/model_O3.onnx"  # Graph-optimized ONNX export on the model's Hub repo
+
 # Chunking Configuration
 CHUNKING_STRATEGY = "layout-aware"  # Options: layout-aware, naive, abstract-first
 
@@ -29,9 +35,13 @@ NAIVE_OVERLAP = 50                 # Token overlap between chunks
 ABSTRACT_MAX_TOKENS = 200          # Maximum tokens for abstract
 ABSTRACT_GENERATION_METHOD = "extractive"  # Options: extractive, llm (llm requires API)
 
+# Chunking cache
+CHUNK_CACHE_SIZE = 4096            # Max cached token counts / abstracts (repeated section text)
+
 # Retrieval Configuration
 DEFAULT_TOP_K = 3                  # Number of results to return by default
 MIN_SIMILARITY_SCORE = 0.3         # Minimum similarity threshold (0-1) - adjusted for L2 distance
+QUERY_CACHE_SIZE = 1024            # Max cached query embeddings per engine (repeated queries)
 
 # Metadata Extraction
 EXTRACT_METADATA = True
@@ -52,6 +62,16 @@ METADATA_PATTERNS = {
 CHROMADB_COLLECTION_NAME = "sre_wiki"
 CHROMADB_PERSIST_DIRECTORY = "./chromadb_index"
 
+CHROMA_ADD_BATCH = 1000            # Chunks per collection.add() call, and per encode batch without the CPU pool (ChromaDB caps at ~5000)
+
+# Optional int8 copy of the embeddings (ingest.py/query.py --quantize int8)
+INT8_INDEX_FILE = "embeddings_int8.npz"  # Stored inside the ChromaDB index directory
+INT8_CANDIDATE_FACTOR = 4          # int8 prefilter keeps n_results * factor candidates for FP32 re-ranking
+
+# Embedding cache (vectors keyed by model name + backend/precision + chunk text hash;
+# reused across ingests). Never pruned: delete the directory to clear it.
+EMBEDDING_CACHE_DIRECTORY = "./embedding_cache"
+
 # Document Processing
 SUPPORTED_EXTENSIONS = [".md", ".markdown"]
 EXCLUDE_PATTERNS = ["README.md", r"^\."]  # Files to skip during ingestion (README and dotfiles)
@@ -65,5 +85,8 @@ LOG_LEVEL = "INFO"  # Options: DEBUG, INFO, WARNING, ERROR
 VERBOSE_OUTPUT = True
 
 # Performance
-BATCH_SIZE = 32  # Embedding batch size for faster processing
+BATCH_SIZE = 128  # Embedding batch size (chunks per model forward pass)
+MULTI_PROCESS_MIN_CHUNKS = 10000  # On CPU (torch backend), encode with a multi-process pool above this many uncached chunks
+MULTI_PROCESS_MAX_WORKERS = 8     # Pool size: half the CPU cores, at most this many processes
+MULTI_PROCESS_CHUNK_SIZE = 5000   # Chunks sent to a pool worker per task
 MAX_WORKERS = 4  # Parallel workers for document processing
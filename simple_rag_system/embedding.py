@@ -0,0 +1,108 @@
+"""
+Embedding helpers shared by ingest.py and query.py.
+
+Loads the sentence-transformers model (once per process) on the
+requested runtime, and provides the int8 quantization used for the
+optional compact copy of the index (stored next to the ChromaDB index
+and used as a query prefilter).
+"""
+
+import os
+from typing import Dict, Tuple
+import numpy as np
+from sentence_transformers import SentenceTransformer
+from rich.console import Console
+
+import config
+
+console = Console()
+
+# Models already loaded in this process, keyed by (name, backend, fp16)
+_MODEL_CACHE: Dict[Tuple[str, str, bool], SentenceTransformer] = {}
+
+
+def load_model(name: str, backend: str = None, fp16: bool = None) -> SentenceTransformer:
+    """
+    Load an embedding model on the requested backend.
+
+    Args:
+        name: sentence-transformers model name
+        backend: "torch" or "onnx" (default: config.EMBEDDING_BACKEND)
+        fp16: Run a torch model in half precision on a CUDA GPU
+            (default: config.EMBEDDING_FP16; ignored on CPU)
+
+    The default is fp32 PyTorch. ONNX Runtime fuses LayerNorm/GEMM kernels
+    and is considerably faster on CPU, but its optimized graph and fp16
+    produce slightly different vectors, so an index should be queried with
+    the same settings it was built with. If the ONNX backend cannot be
+    loaded (extra not installed, no exported model file), falls back to
+    PyTorch.
+    """
+    import torch
+
+    backend = backend or config.EMBEDDING_BACKEND
+    fp16 = config.EMBEDDING_FP16 if fp16 is None else fp16
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+
+    if backend == "onnx":
+        try:
+            return SentenceTransformer(
+                name, device=device, backend="onnx",
+                model_kwargs={"file_name": config.ONNX_MODEL_FILE}
+            )
+        except Exception as e:
+            console.print(f"[yellow]Could not load onnx backend ({e}); using torch[/yellow]")
+
+    model = SentenceTransformer(name, device=device)
+    if fp16:
+        if device == "cuda":
+            model.half()
+        else:
+            console.print("[yellow]fp16 needs a CUDA GPU; using fp32[/yellow]")
+    return model
+
+
+def model_variant(model: SentenceTransformer) -> str:
+    """
+    Describe the runtime a loaded model computes embeddings with.
+
+    Backends and precisions produce slightly different vectors for the same
+    text, so ingest.py includes this in its embedding cache keys
+    (e.g. "torch-float32", "torch-float16", "onnx-onnx/model_O3.onnx").
+    """
+    if getattr(model, "backend", "torch") == "onnx":
+        return f"onnx-{config.ONNX_MODEL_FILE}"
+    dtype = next(model.parameters()).dtype
+    return f"torch-{str(dtype).replace('torch.', '')}"
+
+
+def get_model(name: str, backend: str = None, fp16: bool = None) -> SentenceTransformer:
+    """
+    Return a shared embedding model, loading it on first use.
+
+    DocumentIndexer and RAGQueryEngine created in the same process (tests,
+    notebooks) then share one model instead of loading it twice.
+    """
+    backend = backend or config.EMBEDDING_BACKEND
+    fp16 = config.EMBEDDING_FP16 if fp16 is None else fp16
+    key = (name, backend, fp16)
+    model = _MODEL_CACHE.get(key)
+    if model is None:
+        model = _MODEL_CACHE[key] = load_model(name, backend, fp16)
+    return model
+
+
+def quantize_int8(embeddings: np.ndarray) -> np.ndarray:
+    """
+    Quantize normalized embeddings to int8.
+
+    Components of unit-length vectors lie in [-1, 1], so a single global
+    scale of 127 (symmetric, no zero point) preserves their ordering for
+    dot-product search at a quarter of the float32 size.
+    """
+    return np.clip(np.round(embeddings * 127), -127, 127).astype(np.int8)
+
+
+def int8_index_path(index_path: str) -> str:
+    """Path of the int8 embedding sidecar for a ChromaDB index directory."""
+    return os.path.join(index_path, config.INT8_INDEX_FILE)
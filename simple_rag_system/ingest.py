@@ -7,21 +7,70 @@ Indexes documents from sre_wiki_example/ into ChromaDB vector database.
 
 import os
 import re
+import sys
+import shelve
+import logging
+import hashlib
 import argparse
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Tuple
+import numpy as np
 import chromadb
 from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
 from rich.console import Console
-from rich.progress import track
 from tqdm import tqdm
 
 import config
 from chunker import get_chunker
+from chroma_writer import ChromaWriterProcess
+from embedding import get_model, model_variant, quantize_int8, int8_index_path
 
 console = Console()
 
+# Per-file progress (enabled with --verbose)
+logger = logging.getLogger('ingest')
+logger.addHandler(logging.NullHandler())
+
+# Document metadata: blockquote fields (> **Key:** Value) and the H1 title,
+# found in a single pass over the content. The blockquote value ends at a
+# '|' separator or at the end of the document (hence the \Z lookahead
+# rather than a MULTILINE '$').
+_METADATA_RE = re.compile(
+    r'(?P<field>>\s*\*\*(?P<key>.+?):\*\*\s*(?P<value>.+?)(?:\s*\||(?=\n?\Z)))'
+    r'|(?P<h1>^#\s+(?P<title>.+)$)',
+    re.MULTILINE
+)
+
+# Wiki directory name -> content type
+_CONTENT_TYPES = {
+    'runbooks': 'runbook',
+    'how-to': 'how-to',
+    'incidents': 'incident',
+    'process': 'process',
+    'apps': 'service-overview',
+    'event-prep': 'event-prep',
+}
+
+# File name patterns skipped during ingestion
+_EXCLUDE_PATTERNS = [re.compile(pattern) for pattern in config.EXCLUDE_PATTERNS]
+
+
+def _find_documents(directory: Path) -> List[Path]:
+    """Recursively list files under directory with a supported extension."""
+    extensions = tuple(config.SUPPORTED_EXTENSIONS)
+    found = []
+    pending = [directory]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.name.endswith(extensions) and entry.is_file():
+                    found.append(Path(entry.path))
+    return sorted(found)
+
 
 class MetadataExtractor:
     """Extract metadata from markdown documents."""
@@ -41,17 +90,18 @@ class MetadataExtractor:
             "content_type": MetadataExtractor._infer_content_type(file_path),
         }
 
-        # Extract from blockquote metadata (> **Service:** value | **Env:** value)
-        blockquote_pattern = r'>\s*\*\*(.+?):\*\*\s*(.+?)(?:\s*\||$)'
-        for match in re.finditer(blockquote_pattern, content):
-            key = match.group(1).lower().replace(' ', '_')
-            value = match.group(2).strip()
-            metadata[key] = value
+        # Extract blockquote metadata (> **Service:** value | **Env:** value)
+        # and the first H1 title in one scan
+        title = None
+        for match in _METADATA_RE.finditer(content):
+            if match.lastgroup == 'field':
+                key = match.group('key').lower().replace(' ', '_')
+                metadata[key] = match.group('value').strip()
+            elif title is None:
+                title = match.group('title')
 
-        # Extract H1 title
-        h1_match = re.search(r'^#\s+(.+)$', content, re.MULTILINE)
-        if h1_match:
-            metadata['title'] = h1_match.group(1)
+        if title is not None:
+            metadata['title'] = title
 
         # Clean up specific metadata fields
         if 'service' in metadata:
@@ -63,33 +113,33 @@ class MetadataExtractor:
 
     @staticmethod
     def _infer_content_type(file_path: Path) -> str:
-        """Infer content type from file path."""
-        path_str = str(file_path)
-        if '/runbooks/' in path_str:
-            return 'runbook'
-        elif '/how-to/' in path_str:
-            return 'how-to'
-        elif '/incidents/' in path_str:
-            return 'incident'
-        elif '/process/' in path_str:
-            return 'process'
-        elif '/apps/' in path_str:
-            return 'service-overview'
-        elif '/event-prep/' in path_str:
-            return 'event-prep'
-        else:
-            return 'document'
+        """Infer content type from the directories in file path."""
+        # Innermost matching directory wins (e.g. wiki/process/runbooks/x.md
+        # is a runbook)
+        for part in reversed(file_path.parent.parts):
+            content_type = _CONTENT_TYPES.get(part)
+            if content_type:
+                return content_type
+        return 'document'
 
 
 class DocumentIndexer:
     """Index documents into ChromaDB vector database."""
 
-    def __init__(self, index_path: str = None, embedding_model: str = None):
+    def __init__(self, index_path: str = None, embedding_model: str = None,
+                 quantize: str = None, backend: str = None, fp16: bool = None,
+                 embedding_cache: bool = True):
         self.index_path = index_path or config.CHROMADB_PERSIST_DIRECTORY
         self.embedding_model_name = embedding_model or config.EMBEDDING_MODEL
+        self.quantize = quantize
+        self.embedding_cache = embedding_cache
 
         console.print(f"[cyan]Loading embedding model: {self.embedding_model_name}[/cyan]")
-        self.embedding_model = SentenceTransformer(self.embedding_model_name)
+        self.embedding_model = get_model(self.embedding_model_name, backend, fp16)
+
+        # Embedding cache keys: vectors are only reused for the same model on
+        # the same backend and precision
+        self._cache_key_prefix = f"{self.embedding_model_name}:{model_variant(self.embedding_model)}:"
 
         console.print(f"[cyan]Initializing ChromaDB at: {self.index_path}[/cyan]")
         self.client = chromadb.PersistentClient(path=self.index_path)
@@ -106,6 +156,11 @@ class DocumentIndexer:
             metadata={"description": "SRE Wiki documentation"}
         )
 
+        # An int8 sidecar from a previous ingest no longer matches the collection
+        sidecar = int8_index_path(self.index_path)
+        if os.path.exists(sidecar):
+            os.remove(sidecar)
+
     def index_directory(self, directory: str, strategy: str = None):
         """
         Index all markdown files in directory.
@@ -117,32 +172,55 @@ class DocumentIndexer:
         directory = Path(directory)
         chunker = get_chunker(strategy)
 
-        # Find all markdown files
-        md_files = []
-        for ext in config.SUPPORTED_EXTENSIONS:
-            md_files.extend(directory.rglob(f"*{ext}"))
-
-        # Filter out excluded files
+        # Find all markdown files, skipping excluded ones
         md_files = [
-            f for f in md_files
-            if not any(re.match(pattern, f.name) for pattern in config.EXCLUDE_PATTERNS)
+            f for f in _find_documents(directory)
+            if not any(pattern.match(f.name) for pattern in _EXCLUDE_PATTERNS)
         ]
 
         console.print(f"\n[green]Found {len(md_files)} documents to index[/green]\n")
 
-        # Process each file
-        total_chunks = 0
-        for file_path in track(md_files, description="Indexing documents"):
-            chunks_count = self.index_file(file_path, chunker)
-            total_chunks += chunks_count
+        # Chunk every file first; embedding happens once for the whole corpus.
+        # Files are read and chunked on a thread pool so disk reads overlap
+        # with chunking of other files (results keep md_files order).
+        all_ids = []
+        all_documents = []
+        all_metadatas = []
+        indexed_files = 0
+        with ThreadPoolExecutor(max_workers=config.MAX_WORKERS) as pool:
+            prepared = pool.map(lambda f: self._prepare_file(f, directory, chunker), md_files)
+            for ids, documents, metadatas in tqdm(
+                prepared, total=len(md_files), desc="Chunking documents",
+                disable=not sys.stdout.isatty(), mininterval=0.5
+            ):
+                if not ids:
+                    continue  # no chunks (reported by _prepare_file)
+                indexed_files += 1
+                all_ids.extend(ids)
+                all_documents.extend(documents)
+                all_metadatas.extend(metadatas)
+
+        # Embed all chunks in large batches and add them to ChromaDB
+        # (returns without starting the encoder or writer if there are none)
+        self._embed_and_add(all_ids, all_documents, all_metadatas)
+
+        console.print(f"\n[green]✓ Indexed {indexed_files} documents, {len(all_ids)} chunks total[/green]")
+
+    def _prepare_file(self, file_path: Path, root: Path, chunker) -> Tuple[List[str], List[str], List[Dict]]:
+        """
+        Read and chunk a single file into ChromaDB records (no embedding).
 
-        console.print(f"\n[green]✓ Indexed {len(md_files)} documents, {total_chunks} chunks total[/green]")
+        Args:
+            file_path: Markdown file to chunk
+            root: Directory being indexed; chunk IDs are built from the
+                file's path relative to it
+            chunker: Chunker instance
 
-    def index_file(self, file_path: Path, chunker) -> int:
-        """Index a single file."""
+        Returns:
+            Tuple of (ids, documents, metadatas), one entry per chunk
+        """
         # Read content
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        content = file_path.read_text(encoding='utf-8')
 
         # Extract metadata
         metadata = MetadataExtractor.extract_from_content(content, file_path)
@@ -152,54 +230,214 @@ class DocumentIndexer:
 
         if not chunks:
             console.print(f"[yellow]  No chunks extracted from {file_path.name}[/yellow]")
-            return 0
-
-        # Generate embeddings
-        chunk_texts = [chunk["content"] for chunk in chunks]
-        embeddings = self.embedding_model.encode(chunk_texts, show_progress_bar=False)
+            return [], [], []
 
         # Prepare data for ChromaDB
         ids = []
         metadatas = []
         documents = []
 
-        for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
+        # Path parts shared by every chunk of the file. IDs use the full path
+        # below the indexed root, so same-named files anywhere in the tree
+        # (teams/a/runbooks/x.md, teams/b/runbooks/x.md) do not collide.
+        source_file = str(file_path.relative_to(file_path.parent.parent))
+        id_prefix = file_path.relative_to(root).with_suffix('').as_posix()
+
+        for i, chunk in enumerate(chunks):
             # Create unique ID
-            chunk_id = f"{file_path.stem}-chunk-{i}"
+            chunk_id = f"{id_prefix}-chunk-{i}"
             ids.append(chunk_id)
 
+            # Document-level metadata is shared by all chunks of the file
+            doc_metadata = chunk["metadata"]
+
             # Prepare metadata (ChromaDB requires all values to be strings, ints, or floats)
             chunk_metadata = {
-                "source_file": str(file_path.relative_to(file_path.parent.parent)),
+                "source_file": source_file,
                 "section_title": chunk.get("section_title", ""),
                 "heading_level": chunk.get("heading_level", "h2"),
                 "tokens": chunk.get("tokens", 0),
                 "chunk_index": i,
-                "content_type": chunk.get("content_type", "document"),
+                "content_type": doc_metadata.get("content_type", "document"),
             }
 
             # Add optional metadata fields if present
             optional_fields = ["service_name", "environment", "severity", "owner", "title"]
             for field in optional_fields:
-                if field in chunk and chunk[field]:
-                    chunk_metadata[field] = str(chunk[field])
+                if doc_metadata.get(field):
+                    chunk_metadata[field] = str(doc_metadata[field])
 
             metadatas.append(chunk_metadata)
 
             # Store full content
             documents.append(chunk["content"])
 
-        # Add to ChromaDB
-        self.collection.add(
-            ids=ids,
-            embeddings=embeddings.tolist(),
-            documents=documents,
-            metadatas=metadatas
+        logger.debug("  %s: %d chunks", file_path.name, len(chunks))
+
+        return ids, documents, metadatas
+
+    def _embed_and_add(self, ids: List[str], documents: List[str], metadatas: List[Dict]):
+        """
+        Embed chunk texts in batches and add them to ChromaDB.
+
+        A ChromaWriterProcess writes each batch to ChromaDB while the next
+        batch is being encoded, so the model is not idle during writes.
+        """
+        if not documents:
+            return  # never call encode() or collection.add() with an empty batch
+
+        keys = [self._embedding_key(text) for text in documents]
+        distinct_keys = set(keys)
+
+        # One cache handle, progress bar and summary line for the whole run
+        with self._open_embedding_cache() as cache:
+            # Distinct texts that are not cached yet go through the model
+            n_encode = sum(1 for key in distinct_keys if key not in cache)
+            progress = tqdm(
+                total=n_encode, desc="Encoding chunks", unit="chunk",
+                disable=not sys.stdout.isatty(), mininterval=0.5
+            )
+
+            # On CPU a single PyTorch encode() call saturates only a few cores; for
+            # large ingests spread encoding over several worker processes instead.
+            # ONNX Runtime already threads each call across all cores, and every
+            # worker would build its own session, so the pool is torch-only.
+            # Decided on n_encode, so a cached re-ingest never starts the pool.
+            pool = None
+            window = config.CHROMA_ADD_BATCH
+            workers = min(config.MULTI_PROCESS_MAX_WORKERS, (os.cpu_count() or 1) // 2)
+            if (self.embedding_model.device.type == "cpu"
+                    and getattr(self.embedding_model, "backend", "torch") == "torch"
+                    and workers > 1
+                    and n_encode > config.MULTI_PROCESS_MIN_CHUNKS):
+                console.print(f"[cyan]Encoding with {workers} CPU worker processes[/cyan]")
+                pool = self.embedding_model.start_multi_process_pool(["cpu"] * workers)
+                # Every encode_multi_process() call pays a round trip to the
+                # workers, so hand the pool a full chunk per worker at a time
+                window = config.MULTI_PROCESS_CHUNK_SIZE * workers
+
+            # self.collection is not used while the writer process owns the writes
+            # (see chroma_writer for why the two clients can coexist)
+            writer = ChromaWriterProcess(self.index_path)
+            writer.start()
+            quantized = []
+            try:
+                for window_start in range(0, len(ids), window):
+                    window_end = window_start + window
+                    window_embeddings = self._embed(
+                        documents[window_start:window_end], keys[window_start:window_end],
+                        cache, pool, progress
+                    )
+                    if self.quantize == "int8":
+                        quantized.append(quantize_int8(window_embeddings))
+                    for start in range(window_start, min(window_end, len(ids)), config.CHROMA_ADD_BATCH):
+                        end = start + config.CHROMA_ADD_BATCH
+                        writer.put({
+                            "ids": ids[start:end],
+                            "embeddings": window_embeddings[start - window_start:end - window_start],
+                            "documents": documents[start:end],
+                            "metadatas": metadatas[start:end],
+                        })
+            except BaseException:
+                # Report the encode error itself, not the writer's shutdown
+                writer.abort()
+                raise
+            finally:
+                progress.close()
+                if pool is not None:
+                    self.embedding_model.stop_multi_process_pool(pool)
+
+            writer.close()
+
+        console.print(
+            f"[dim]Embeddings: {len(documents)} chunks, {len(distinct_keys)} distinct, "
+            f"{n_encode} encoded[/dim]"
         )
 
-        console.print(f"  [dim]{file_path.name}: {len(chunks)} chunks[/dim]")
+        if quantized:
+            # Compact int8 copy used by query.py --quantize int8 as a prefilter
+            np.savez(
+                int8_index_path(self.index_path),
+                ids=np.array(ids),
+                embeddings=np.concatenate(quantized)
+            )
+            console.print(f"[dim]Saved int8 embeddings to {int8_index_path(self.index_path)}[/dim]")
+
+    def _embed(self, texts: List[str], keys: List[str], cache, pool: Dict = None,
+               progress: tqdm = None) -> np.ndarray:
+        """
+        Embed texts, encoding each distinct text only once.
 
-        return len(chunks)
+        Wiki pages share boilerplate (intros, "See also" blocks), so texts are
+        keyed by a content hash. Unless disabled (--no-embedding-cache),
+        vectors are looked up in a persistent on-disk cache keyed by
+        (model, backend/precision, hash) first, so re-ingesting unchanged
+        content skips the model entirely; only texts never seen before are
+        encoded (and added to the cache).
+
+        Args:
+            texts: Chunk texts to embed
+            keys: Cache key of each text (see _embedding_key)
+            cache: Open embedding cache (shelf or dict)
+            pool: Optional sentence-transformers multi-process pool to encode with
+            progress: Optional progress bar advanced by the number of texts encoded
+        """
+        vectors = {}
+        missing = {}  # key -> text, distinct texts that need encoding
+        for key, text in zip(keys, texts):
+            if key in vectors or key in missing:
+                continue
+            if key in cache:
+                vectors[key] = cache[key]
+            else:
+                missing[key] = text
+
+        if missing:
+            missing_keys = list(missing)
+            missing_texts = [missing[key] for key in missing_keys]
+
+            # Each mini-batch is padded to its longest text, so encode
+            # texts in length order to keep similar lengths together
+            order = np.argsort([len(text) for text in missing_texts], kind="stable")
+            sorted_texts = [missing_texts[i] for i in order]
+            if pool is not None:
+                sorted_embeddings = self.embedding_model.encode_multi_process(
+                    sorted_texts,
+                    pool,
+                    batch_size=config.BATCH_SIZE,
+                    chunk_size=config.MULTI_PROCESS_CHUNK_SIZE,
+                    show_progress_bar=False,
+                    normalize_embeddings=True
+                )
+            else:
+                sorted_embeddings = self.embedding_model.encode(
+                    sorted_texts,
+                    batch_size=config.BATCH_SIZE,
+                    show_progress_bar=False,
+                    convert_to_numpy=True,
+                    normalize_embeddings=True
+                )
+            for i, embedding in zip(order, sorted_embeddings):
+                vectors[missing_keys[i]] = embedding
+                cache[missing_keys[i]] = embedding
+            if progress is not None:
+                progress.update(len(missing))
+
+        # Scatter vectors back to the original order (aligned with ids).
+        # ChromaDB takes the float32 ndarray directly, avoiding a .tolist()
+        # copy into millions of boxed Python floats.
+        return np.stack([vectors[key] for key in keys]).astype(np.float32, copy=False)
+
+    def _embedding_key(self, text: str) -> str:
+        """Embedding cache key of a chunk text."""
+        return self._cache_key_prefix + hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _open_embedding_cache(self):
+        """Open the persistent embedding cache, or an empty in-memory one if disabled."""
+        if not self.embedding_cache:
+            return nullcontext({})
+        os.makedirs(config.EMBEDDING_CACHE_DIRECTORY, exist_ok=True)
+        return shelve.open(os.path.join(config.EMBEDDING_CACHE_DIRECTORY, "embeddings"))
 
 
 def main():
@@ -231,9 +469,43 @@ def main():
         default=config.EMBEDDING_MODEL,
         help="Sentence-transformers model to use for embeddings"
     )
+    parser.add_argument(
+        "--backend",
+        type=str,
+        choices=["torch", "onnx"],
+        default=config.EMBEDDING_BACKEND,
+        help="Embedding inference backend (onnx is faster on CPU; use the same backend for ingest and query)"
+    )
+    parser.add_argument(
+        "--fp16",
+        action="store_true",
+        default=config.EMBEDDING_FP16,
+        help="Run the torch model in half precision on a CUDA GPU (use the same setting for ingest and query)"
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Print the chunk count of every indexed file"
+    )
+    parser.add_argument(
+        "--no-embedding-cache",
+        action="store_true",
+        help=f"Encode every chunk instead of reusing vectors cached in {config.EMBEDDING_CACHE_DIRECTORY}"
+    )
+    parser.add_argument(
+        "--quantize",
+        type=str,
+        choices=["none", "int8"],
+        default="none",
+        help="Also store an int8 copy of the embeddings for fast prefiltering in query.py"
+    )
 
     args = parser.parse_args()
 
+    if args.verbose:
+        logging.basicConfig(format="%(message)s")
+        logger.setLevel(logging.DEBUG)
+
     console.print("\n[bold cyan]SRE Wiki Document Indexer[/bold cyan]\n")
     console.print(f"Input directory: {args.input}")
     console.print(f"Output index: {args.output}")
@@ -241,7 +513,14 @@ def main():
     console.print(f"Embedding model: {args.model}\n")
 
     # Create indexer and run
-    indexer = DocumentIndexer(index_path=args.output, embedding_model=args.model)
+    indexer = DocumentIndexer(
+        index_path=args.output,
+        embedding_model=args.model,
+        quantize=None if args.quantize == "none" else args.quantize,
+        backend=args.backend,
+        fp16=args.fp16,
+        embedding_cache=not args.no_embedding_cache
+    )
     indexer.index_directory(args.input, strategy=args.strategy)
 
     console.print(f"\n[bold green]✓ Indexing complete![/bold green]")
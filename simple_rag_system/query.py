@@ -6,16 +6,17 @@ Search the indexed wiki documents using semantic similarity.
 """
 
 import argparse
+import os
 import sys
+from functools import lru_cache
 from typing import List, Dict, Optional
+import numpy as np
 import chromadb
 from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
 from rich.console import Console
-from rich.panel import Panel
-from rich.markdown import Markdown
 
 import config
+from embedding import get_model, quantize_int8, int8_index_path
 
 console = Console()
 
@@ -23,13 +24,22 @@ console = Console()
 class RAGQueryEngine:
     """Query engine for RAG system."""
 
-    def __init__(self, index_path: str = None, embedding_model: str = None):
+    def __init__(self, index_path: str = None, embedding_model: str = None,
+                 quantize: str = None, backend: str = None, fp16: bool = None):
         self.index_path = index_path or config.CHROMADB_PERSIST_DIRECTORY
         self.embedding_model_name = embedding_model or config.EMBEDDING_MODEL
 
         # Load embedding model
         console.print(f"[cyan]Loading embedding model: {self.embedding_model_name}[/cyan]")
-        self.embedding_model = SentenceTransformer(self.embedding_model_name)
+        self.embedding_model = get_model(self.embedding_model_name, backend, fp16)
+
+        # Per-engine cache of query embeddings (float32 bytes, so cached values are immutable)
+        @lru_cache(maxsize=config.QUERY_CACHE_SIZE)
+        def embed_query(text: str) -> bytes:
+            embedding = self.embedding_model.encode(text, normalize_embeddings=True)
+            return embedding.astype(np.float32).tobytes()
+
+        self._embed_query = embed_query
 
         # Load ChromaDB
         console.print(f"[cyan]Loading index from: {self.index_path}[/cyan]")
@@ -44,6 +54,20 @@ class RAGQueryEngine:
             console.print(f"[yellow]Have you run ingest.py first?[/yellow]")
             sys.exit(1)
 
+        # Optional int8 prefilter index (written by ingest.py --quantize int8)
+        self.int8_ids = None
+        self.int8_embeddings = None
+        if quantize == "int8":
+            sidecar = int8_index_path(self.index_path)
+            if os.path.exists(sidecar):
+                with np.load(sidecar) as data:
+                    self.int8_ids = data["ids"]
+                    self.int8_embeddings = data["embeddings"]
+                console.print(f"[green]✓ Loaded int8 prefilter index ({len(self.int8_ids)} chunks)[/green]\n")
+            else:
+                console.print(f"[yellow]No int8 index at {sidecar}; using full-precision search[/yellow]")
+                console.print(f"[yellow]Re-run ingest.py with --quantize int8 to create it[/yellow]\n")
+
     def query(
         self,
         query: str,
@@ -64,44 +88,82 @@ class RAGQueryEngine:
             List of result dicts with content, metadata, and scores
         """
         top_k = top_k or config.DEFAULT_TOP_K
-        min_score = min_score or config.MIN_SIMILARITY_SCORE
+        if min_score is None:
+            min_score = config.MIN_SIMILARITY_SCORE
 
         # Generate query embedding
-        query_embedding = self.embedding_model.encode(query)
-
-        # Query ChromaDB
-        results = self.collection.query(
-            query_embeddings=[query_embedding.tolist()],
-            n_results=top_k * 2,  # Get extra results for filtering
-            where=filters
-        )
+        # (normalized, matching the document embeddings written by ingest.py)
+        query_embedding = np.frombuffer(self._embed_query(query), dtype=np.float32)
+
+        # Get extra results only when some may be dropped by the score threshold
+        n_results = top_k * 2 if min_score > 0 else top_k
+
+        # Query ChromaDB (the int8 prefilter does not support metadata filters)
+        if self.int8_embeddings is not None and not filters:
+            results = self._int8_search(query_embedding, n_results)
+        else:
+            results = self.collection.query(
+                query_embeddings=[query_embedding],
+                n_results=n_results,
+                where=filters,
+                include=['documents', 'metadatas', 'distances']
+            )
 
         # Process results
-        formatted_results = []
-        for i in range(len(results['ids'][0])):
-            # Calculate similarity score (ChromaDB returns L2 distance by default)
-            # Convert distance to similarity score (0-1, where 1 is most similar)
-            # For L2 distance, smaller is better, so we use: similarity = 1 / (1 + distance)
-            distance = results['distances'][0][i] if 'distances' in results else 0
-            similarity = 1 / (1 + distance)  # Converts distance to 0-1 score
-
-            # Filter by minimum score
-            if similarity < min_score:
-                continue
+        # Calculate similarity scores (ChromaDB returns L2 distance by default)
+        # Convert distance to similarity score (0-1, where 1 is most similar)
+        # For L2 distance, smaller is better, so we use: similarity = 1 / (1 + distance)
+        distances = np.asarray(results['distances'][0], dtype=np.float32)
+        similarities = 1.0 / (1.0 + distances)
 
+        # Filter by minimum score and stop once we have enough results
+        formatted_results = []
+        for i in np.flatnonzero(similarities >= min_score)[:top_k]:
             formatted_results.append({
                 "id": results['ids'][0][i],
                 "content": results['documents'][0][i],
                 "metadata": results['metadatas'][0][i],
-                "score": similarity
+                "score": float(similarities[i])
             })
 
-            # Stop if we have enough results
-            if len(formatted_results) >= top_k:
-                break
-
         return formatted_results
 
+    def _int8_search(self, query_embedding: np.ndarray, n_results: int) -> Dict:
+        """
+        Search with the int8 index, then re-rank candidates at full precision.
+
+        A brute-force int8 dot product over all chunks keeps the best
+        n_results * INT8_CANDIDATE_FACTOR candidates; their float32
+        embeddings are fetched from ChromaDB and ranked by squared L2
+        distance (the distance ChromaDB itself reports), so scores match
+        the regular search path.
+
+        Returns:
+            Results shaped like collection.query() output
+        """
+        scores = np.einsum(
+            'nd,d->n', self.int8_embeddings, quantize_int8(query_embedding), dtype=np.int32
+        )
+        n_candidates = min(len(scores), n_results * config.INT8_CANDIDATE_FACTOR)
+        if n_candidates == 0:
+            return {'ids': [[]], 'documents': [[]], 'metadatas': [[]], 'distances': [[]]}
+        candidates = np.argpartition(-scores, n_candidates - 1)[:n_candidates]
+
+        fetched = self.collection.get(
+            ids=[str(self.int8_ids[i]) for i in candidates],
+            include=['embeddings', 'documents', 'metadatas']
+        )
+        embeddings = np.asarray(fetched['embeddings'], dtype=np.float32)
+        distances = np.sum((embeddings - query_embedding) ** 2, axis=1)
+        order = np.argsort(distances)[:n_results]
+
+        return {
+            'ids': [[fetched['ids'][i] for i in order]],
+            'documents': [[fetched['documents'][i] for i in order]],
+            'metadatas': [[fetched['metadatas'][i] for i in order]],
+            'distances': [[float(distances[i]) for i in order]],
+        }
+
     def interactive_mode(self):
         """Run interactive query mode."""
         console.print("\n[bold cyan]Interactive Query Mode[/bold cyan]")
@@ -138,6 +200,19 @@ class RAGQueryEngine:
 
         console.print(f"\n[bold]Results for:[/bold] \"{query}\"\n")
 
+        if not console.is_terminal:
+            # Piped/scripted output: plain text, no Markdown parsing or panels
+            for i, result in enumerate(results, 1):
+                source = result['metadata'].get('source_file', 'Unknown')
+                console.print(
+                    f"[{i}] {result['score']:.2f} {source}\n{result['content'][:500]}\n",
+                    markup=False, highlight=False, soft_wrap=True
+                )
+            return
+
+        from rich.panel import Panel
+        from rich.markdown import Markdown
+
         for i, result in enumerate(results, 1):
             metadata = result['metadata']
             score = result['score']
@@ -220,6 +295,26 @@ def main():
         default=config.EMBEDDING_MODEL,
         help="Sentence-transformers model"
     )
+    parser.add_argument(
+        "--backend",
+        type=str,
+        choices=["torch", "onnx"],
+        default=config.EMBEDDING_BACKEND,
+        help="Embedding inference backend (onnx is faster on CPU; use the same backend for ingest and query)"
+    )
+    parser.add_argument(
+        "--fp16",
+        action="store_true",
+        default=config.EMBEDDING_FP16,
+        help="Run the torch model in half precision on a CUDA GPU (use the same setting for ingest and query)"
+    )
+    parser.add_argument(
+        "--quantize",
+        type=str,
+        choices=["none", "int8"],
+        default="none",
+        help="Prefilter with the int8 index from ingest.py --quantize int8, then re-rank at full precision"
+    )
 
     args = parser.parse_args()
 
@@ -231,7 +326,13 @@ def main():
         filters["content_type"] = args.filter_type
 
     # Create query engine
-    engine = RAGQueryEngine(index_path=args.index, embedding_model=args.model)
+    engine = RAGQueryEngine(
+        index_path=args.index,
+        embedding_model=args.model,
+        quantize=None if args.quantize == "none" else args.quantize,
+        backend=args.backend,
+        fp16=args.fp16
+    )
 
     if args.query:
         # Single query mode
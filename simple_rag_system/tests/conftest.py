@@ -0,0 +1,6 @@
+"""Test setup: the RAG scripts are plain modules in the parent directory."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,56 @@
+"""Tests for chroma_writer.py."""
+
+import chromadb
+import numpy as np
+import pytest
+
+import config
+from chroma_writer import ChromaWriterProcess
+
+
+def _batch(ids):
+    return {
+        "ids": ids,
+        "embeddings": np.ones((len(ids), 2), dtype=np.float32),
+        "documents": [f"text {i}" for i in ids],
+        "metadatas": [{"n": n} for n in range(len(ids))],
+    }
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    client = chromadb.PersistentClient(path=str(tmp_path))
+    client.create_collection(name=config.CHROMADB_COLLECTION_NAME)
+    return str(tmp_path)
+
+
+def test_close_writes_all_batches(index_path):
+    writer = ChromaWriterProcess(index_path)
+    writer.start()
+    for start in range(0, 6, 2):
+        writer.put(_batch([f"doc-{n}" for n in range(start, start + 2)]))
+    writer.close()
+
+    assert writer.exitcode == 0
+    client = chromadb.PersistentClient(path=index_path)
+    assert client.get_collection(name=config.CHROMADB_COLLECTION_NAME).count() == 6
+
+
+def test_close_raises_when_a_write_fails(index_path):
+    writer = ChromaWriterProcess(index_path)
+    writer.start()
+    writer.put(_batch(["dup", "dup"]))
+    writer.put(_batch(["doc-0"]))  # still drained after the failure
+
+    with pytest.raises(RuntimeError, match="exit code 1"):
+        writer.close()
+
+
+def test_abort_stops_the_process(index_path):
+    writer = ChromaWriterProcess(index_path)
+    writer.start()
+    writer.put(_batch(["doc-0"]))
+
+    writer.abort()
+
+    assert not writer.is_alive()
@@ -0,0 +1,111 @@
+"""Tests for chunker.py."""
+
+import random
+import re
+from pathlib import Path
+
+import pytest
+
+import config
+from chunker import LayoutAwareChunker, NaiveChunker
+
+WIKI = Path(__file__).resolve().parents[2] / "sre_wiki_example"
+
+
+def _split_by_lines(content, heading_pattern, default_title):
+    """The original line-by-line section splitter, kept as a reference."""
+    sections = []
+    current_section = []
+    current_title = default_title
+
+    for line in content.split('\n'):
+        match = re.match(heading_pattern, line)
+        if match:
+            if current_section:
+                sections.append({
+                    "title": current_title,
+                    "content": '\n'.join(current_section).strip()
+                })
+            current_title = match.group(1)
+            current_section = [line]
+        else:
+            current_section.append(line)
+
+    if current_section:
+        sections.append({
+            "title": current_title,
+            "content": '\n'.join(current_section).strip()
+        })
+
+    return sections
+
+
+def _assert_splits_like_reference(chunker, content):
+    assert chunker._split_by_h2(content) == _split_by_lines(content, r'^##\s+(.+)$', "Introduction")
+    assert chunker._split_by_h3(content) == _split_by_lines(content, r'^###\s+(.+)$', "Section")
+
+
+@pytest.fixture(scope="module")
+def layout_chunker():
+    return LayoutAwareChunker()
+
+
+@pytest.mark.parametrize("content", [
+    "",
+    "no headings at all",
+    "## First\nbody",
+    "\n## After blank line\nbody",
+    "# Title\nintro\n## A\na\n### A.1\nx\n### A.2\ny\n## B\nb\n",
+    "##NoSpace\n## \n##\ttab title\n###  spaced\n",
+    "## Windows\r\nline endings\r\n## Second\r\n",
+    "text\n\n## Trailing heading",
+])
+def test_split_by_heading_matches_line_splitter(layout_chunker, content):
+    _assert_splits_like_reference(layout_chunker, content)
+
+
+def test_split_by_heading_matches_line_splitter_on_wiki(layout_chunker):
+    for path in sorted(WIKI.rglob("*.md")):
+        _assert_splits_like_reference(layout_chunker, path.read_text(encoding="utf-8"))
+
+
+def test_split_by_heading_matches_line_splitter_on_random_text(layout_chunker):
+    atoms = ["## ", "##", "###", "### ", "#", " ", "\t", "\n", "\r\n", "Title", "text. ", "\n\n"]
+    rng = random.Random(0)
+    for _ in range(2000):
+        content = "".join(rng.choice(atoms) for _ in range(rng.randint(0, 25)))
+        _assert_splits_like_reference(layout_chunker, content)
+
+
+@pytest.mark.parametrize("chunk_size, overlap", [(16, 4), (16, 0), (5, 4), (1, 0)])
+def test_naive_windows_cover_every_token(monkeypatch, chunk_size, overlap):
+    monkeypatch.setattr(config, "NAIVE_CHUNK_SIZE", chunk_size)
+    monkeypatch.setattr(config, "NAIVE_OVERLAP", overlap)
+    chunker = NaiveChunker()
+    content = (WIKI / "runbooks" / "database-failover.md").read_text(encoding="utf-8")[:2000]
+    tokens = chunker.encoding.encode(content)
+
+    chunks = chunker.chunk(content, {})
+
+    assert chunks[0]["start_token"] == 0
+    assert chunks[-1]["end_token"] == len(tokens)
+    for previous, current in zip(chunks, chunks[1:]):
+        # Consecutive windows advance by chunk_size - overlap and overlap by exactly `overlap`
+        assert current["start_token"] - previous["start_token"] == chunk_size - overlap
+        assert previous["end_token"] - current["start_token"] == overlap
+    for chunk in chunks:
+        assert chunk["tokens"] == chunk["end_token"] - chunk["start_token"] <= chunk_size
+    # Only the last window may reach the end of the document
+    assert all(chunk["end_token"] < len(tokens) for chunk in chunks[:-1])
+
+
+def test_naive_empty_content_has_no_chunks():
+    assert NaiveChunker().chunk("", {}) == []
+
+
+@pytest.mark.parametrize("overlap", [16, 17])
+def test_naive_rejects_overlap_not_smaller_than_chunk_size(monkeypatch, overlap):
+    monkeypatch.setattr(config, "NAIVE_CHUNK_SIZE", 16)
+    monkeypatch.setattr(config, "NAIVE_OVERLAP", overlap)
+    with pytest.raises(ValueError):
+        NaiveChunker()
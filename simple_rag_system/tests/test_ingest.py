@@ -0,0 +1,243 @@
+"""Tests for ingest.py."""
+
+import re
+import types
+from contextlib import nullcontext
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("sentence_transformers")
+
+import ingest  # noqa: E402
+from ingest import MetadataExtractor  # noqa: E402
+
+RUNBOOK = Path("wiki/runbooks/restart.md")
+WIKI = Path(__file__).resolve().parents[2] / "sre_wiki_example"
+
+
+def extract(content, path=RUNBOOK):
+    return MetadataExtractor.extract_from_content(content, path)
+
+
+def _extract_with_original_patterns(content, path=RUNBOOK):
+    """The original two-pass field/title extraction, kept as a reference."""
+    metadata = {
+        "source_file": str(path),
+        "content_type": MetadataExtractor._infer_content_type(path),
+    }
+    for match in re.finditer(r'>\s*\*\*(.+?):\*\*\s*(.+?)(?:\s*\||$)', content):
+        metadata[match.group(1).lower().replace(' ', '_')] = match.group(2).strip()
+    h1_match = re.search(r'^#\s+(.+)$', content, re.MULTILINE)
+    if h1_match:
+        metadata['title'] = h1_match.group(1)
+    if 'service' in metadata:
+        metadata['service_name'] = metadata['service']
+    if 'severity' in metadata:
+        metadata['severity'] = metadata['severity'].upper()
+    return metadata
+
+
+@pytest.mark.parametrize("content", [
+    "",
+    "plain text\n## Section\n",
+    "# Title\n\n> **Service:** auth-service | **Environment:** prod | **Severity:** sev2\n",
+    "> **Service:** payments",
+    "> **Service:** payments\n",
+    "> **Service:** payments\nnext line\n> **Owner:** sre\n",
+    "> **Severity:** sev1 |\n# T\n",
+    "## Not a title\n# First\ntext\n# Second\n",
+    "#  Spaced  title\n",
+    "> **Owner Team:** identity |\n> **Owner Team:** platform |\n",
+])
+def test_metadata_matches_original_patterns(content):
+    assert extract(content) == _extract_with_original_patterns(content)
+
+
+def test_metadata_matches_original_patterns_on_wiki():
+    for path in sorted(WIKI.rglob("*.md")):
+        content = path.read_text(encoding="utf-8")
+        assert extract(content, path) == _extract_with_original_patterns(content, path), path
+
+
+def test_blockquote_fields_and_title():
+    metadata = extract(
+        "# Auth Service Restart\n"
+        "\n"
+        "> **Service:** auth-service |\n"
+        "> **Severity:** sev2 |\n"
+        "> **Owner Team:** identity\n"
+    )
+    assert metadata["title"] == "Auth Service Restart"
+    assert metadata["service"] == metadata["service_name"] == "auth-service"
+    assert metadata["severity"] == "SEV2"
+    # A field without a '|' separator is only matched at the end of the document
+    assert metadata["owner_team"] == "identity"
+
+
+@pytest.mark.parametrize("path, content_type", [
+    ("wiki/runbooks/x.md", "runbook"),
+    ("wiki/how-to/x.md", "how-to"),
+    ("wiki/incidents/x.md", "incident"),
+    ("wiki/process/x.md", "process"),
+    ("wiki/apps/auth-service/overview.md", "service-overview"),
+    ("wiki/event-prep/x.md", "event-prep"),
+    ("wiki/stakeholders/x.md", "document"),
+    ("x.md", "document"),
+    # The innermost known directory wins
+    ("wiki/runbooks/process/x.md", "process"),
+    ("wiki/process/runbooks/x.md", "runbook"),
+    ("wiki/apps/payments/runbooks/x.md", "runbook"),
+    # Directory names must match exactly
+    ("wiki/runbooks-archive/x.md", "document"),
+])
+def test_content_type_from_innermost_directory(path, content_type):
+    assert MetadataExtractor._infer_content_type(Path(path)) == content_type
+
+
+class _NoEncodeModel:
+    """Stands in for the embedding model in tests that must not encode."""
+
+    def encode(self, *args, **kwargs):
+        raise AssertionError("encode() called")
+
+
+@pytest.fixture
+def indexer(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest, "get_model", lambda name, backend=None, fp16=None: _NoEncodeModel())
+    monkeypatch.setattr(ingest, "model_variant", lambda model: "test")
+    return ingest.DocumentIndexer(index_path=str(tmp_path / "index"), embedding_cache=False)
+
+
+def _write_wiki(root, files):
+    for name, content in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+    return root
+
+
+def test_chunkless_files_are_skipped_and_not_counted(indexer, tmp_path, monkeypatch, capsys):
+    wiki = _write_wiki(tmp_path / "wiki", {
+        "runbooks/empty.md": "",
+        "runbooks/restart.md": "# Restart\n\n## Procedure\n" + "Restart the service. " * 40,
+    })
+    added = []
+    monkeypatch.setattr(indexer, "_embed_and_add", lambda ids, documents, metadatas: added.append(ids))
+
+    indexer.index_directory(str(wiki))
+
+    assert added == [["runbooks/restart-chunk-0"]]
+    assert "Indexed 1 documents, 1 chunks total" in capsys.readouterr().out
+
+
+def test_no_chunks_never_encodes_or_writes(indexer, tmp_path, monkeypatch, capsys):
+    wiki = _write_wiki(tmp_path / "wiki", {"runbooks/empty.md": ""})
+
+    def no_writer(*args, **kwargs):
+        raise AssertionError("writer process started")
+
+    monkeypatch.setattr(ingest, "ChromaWriterProcess", no_writer)
+
+    indexer.index_directory(str(wiki))
+
+    assert indexer.collection.count() == 0
+    assert "Indexed 0 documents, 0 chunks total" in capsys.readouterr().out
+
+
+class _RecordingModel:
+    """Encodes each text to a vector derived from its length; records calls."""
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, **kwargs):
+        self.calls.append(list(texts))
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+
+def test_embed_dedups_and_keeps_vectors_aligned_with_texts(indexer):
+    model = _RecordingModel()
+    indexer.embedding_model = model
+    texts = ["ccc", "a", "bbbbb", "a", "cached", "ccc", "dd"]
+    keys = [indexer._embedding_key(text) for text in texts]
+    cache = {indexer._embedding_key("cached"): np.array([-1.0, -1.0], dtype=np.float32)}
+
+    embeddings = indexer._embed(texts, keys, cache)
+
+    # Distinct, uncached texts are encoded once, shortest first
+    assert model.calls == [["a", "dd", "ccc", "bbbbb"]]
+    expected = [[-1.0, -1.0] if text == "cached" else [len(text), 1.0] for text in texts]
+    np.testing.assert_array_equal(embeddings, np.array(expected, dtype=np.float32))
+    assert embeddings.dtype == np.float32
+    # Newly encoded vectors are added to the cache
+    assert set(cache) == set(keys)
+
+
+class _PoolModel(_RecordingModel):
+    """CPU torch model that records multi-process pool use."""
+
+    device = types.SimpleNamespace(type="cpu")
+    backend = "torch"
+
+    def __init__(self):
+        super().__init__()
+        self.pools_started = 0
+
+    def start_multi_process_pool(self, devices):
+        self.pools_started += 1
+        return {"devices": devices}
+
+    def stop_multi_process_pool(self, pool):
+        pass
+
+    def encode_multi_process(self, texts, pool, **kwargs):
+        return self.encode(texts)
+
+
+class _FakeWriter:
+    """Records the batches ingest hands to ChromaWriterProcess."""
+
+    def __init__(self, index_path, *args):
+        self.batches = []
+        _FakeWriter.last = self
+
+    def start(self):
+        pass
+
+    def put(self, batch):
+        self.batches.append(batch)
+
+    def close(self):
+        pass
+
+
+def test_pool_is_sized_by_uncached_chunks_and_fed_in_windows(indexer, monkeypatch):
+    monkeypatch.setattr(ingest.os, "cpu_count", lambda: 4)  # 2 workers
+    monkeypatch.setattr(ingest.config, "MULTI_PROCESS_MIN_CHUNKS", 3)
+    monkeypatch.setattr(ingest.config, "MULTI_PROCESS_CHUNK_SIZE", 3)
+    monkeypatch.setattr(ingest.config, "CHROMA_ADD_BATCH", 2)
+    monkeypatch.setattr(ingest, "ChromaWriterProcess", _FakeWriter)
+    cache = {}
+    monkeypatch.setattr(indexer, "_open_embedding_cache", lambda: nullcontext(cache))
+    model = _PoolModel()
+    indexer.embedding_model = model
+    documents = ["x" * n for n in range(1, 9)]
+    ids = [f"doc-chunk-{n}" for n in range(8)]
+
+    indexer._embed_and_add(ids, documents, [{}] * 8)
+
+    assert model.pools_started == 1
+    assert [len(call) for call in model.calls] == [6, 2]  # CHUNK_SIZE * workers per call
+    batches = _FakeWriter.last.batches
+    assert [batch["ids"] for batch in batches] == [ids[i:i + 2] for i in range(0, 8, 2)]
+    for batch in batches:
+        np.testing.assert_array_equal(
+            batch["embeddings"][:, 0], [len(text) for text in batch["documents"]]
+        )
+
+    # Re-ingesting cached content leaves nothing to encode: no pool
+    indexer._embed_and_add(ids, documents, [{}] * 8)
+    assert model.pools_started == 1
+    assert len(model.calls) == 2
@@ -0,0 +1,134 @@
+"""Tests for query.py."""
+
+import chromadb
+import numpy as np
+import pytest
+
+pytest.importorskip("sentence_transformers")
+
+import query as query_module  # noqa: E402
+from embedding import quantize_int8  # noqa: E402
+from query import RAGQueryEngine  # noqa: E402
+
+
+@pytest.fixture
+def engine(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((200, 32)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ids = [f"doc-{i}" for i in range(len(vectors))]
+
+    client = chromadb.PersistentClient(path=str(tmp_path))
+    collection = client.create_collection(name="test", metadata={"hnsw:search_ef": 200})
+    collection.add(
+        ids=ids,
+        embeddings=vectors,
+        documents=[f"text {i}" for i in range(len(vectors))],
+        metadatas=[{"n": i} for i in range(len(vectors))],
+    )
+
+    # Only the attributes _int8_search uses; no embedding model needed
+    engine = RAGQueryEngine.__new__(RAGQueryEngine)
+    engine.collection = collection
+    engine.int8_ids = np.array(ids)
+    engine.int8_embeddings = quantize_int8(vectors)
+    return engine
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_int8_search_matches_collection_query(engine, seed):
+    query = np.random.default_rng(100 + seed).standard_normal(32).astype(np.float32)
+    query /= np.linalg.norm(query)
+
+    expected = engine.collection.query(
+        query_embeddings=[query],
+        n_results=6,
+        include=['documents', 'metadatas', 'distances']
+    )
+    actual = engine._int8_search(query, 6)
+
+    assert actual['ids'] == expected['ids']
+    assert actual['documents'] == expected['documents']
+    assert actual['metadatas'] == expected['metadatas']
+    np.testing.assert_allclose(actual['distances'][0], expected['distances'][0], rtol=1e-4, atol=1e-5)
+
+
+def test_int8_search_empty_index(engine):
+    engine.int8_ids = engine.int8_ids[:0]
+    engine.int8_embeddings = engine.int8_embeddings[:0]
+    result = engine._int8_search(np.ones(32, dtype=np.float32) / np.sqrt(32), 3)
+    assert result['ids'] == [[]]
+
+
+class _CountingModel:
+    """Stands in for the embedding model; counts encode() calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, text, normalize_embeddings=False):
+        self.calls += 1
+        return np.array([len(text), 1.0], dtype=np.float64)
+
+
+def test_query_embeddings_are_cached_per_engine(tmp_path, monkeypatch):
+    client = chromadb.PersistentClient(path=str(tmp_path))
+    client.create_collection(name=query_module.config.CHROMADB_COLLECTION_NAME)
+    monkeypatch.setattr(query_module, "get_model", lambda name, backend=None, fp16=None: _CountingModel())
+    first = RAGQueryEngine(index_path=str(tmp_path))
+    second = RAGQueryEngine(index_path=str(tmp_path))
+
+    embedding = first._embed_query("restart the api")
+    assert first._embed_query("restart the api") == embedding
+    assert first.embedding_model.calls == 1
+    assert np.frombuffer(embedding, dtype=np.float32).tolist() == [15.0, 1.0]
+
+    # Another engine (possibly another model) does not see the first one's cache
+    second._embed_query("restart the api")
+    assert second.embedding_model.calls == 1
+
+
+class _RecordingCollection:
+    """Returns fixed distances from query() and records its n_results."""
+
+    def __init__(self, distances):
+        self.distances = distances
+        self.n_results = []
+
+    def query(self, query_embeddings, n_results, where=None, include=None):
+        self.n_results.append(n_results)
+        distances = self.distances[:n_results]
+        return {
+            'ids': [[f"doc-{i}" for i in range(len(distances))]],
+            'documents': [[f"text {i}" for i in range(len(distances))]],
+            'metadatas': [[{"n": i} for i in range(len(distances))]],
+            'distances': [distances],
+        }
+
+
+@pytest.fixture
+def scored_engine(monkeypatch):
+    monkeypatch.setattr(query_module.config, "MIN_SIMILARITY_SCORE", 0.4)
+    engine = RAGQueryEngine.__new__(RAGQueryEngine)
+    engine._embed_query = lambda text: np.ones(2, dtype=np.float32).tobytes()
+    engine.int8_embeddings = None
+    # Scores 1/(1+d): 0.8, 0.5, 0.25, 0.2
+    engine.collection = _RecordingCollection([0.25, 1.0, 3.0, 4.0])
+    return engine
+
+
+def test_min_score_zero_keeps_every_result(scored_engine):
+    results = scored_engine.query("q", top_k=3, min_score=0)
+
+    assert [r["id"] for r in results] == ["doc-0", "doc-1", "doc-2"]
+    assert scored_engine.collection.n_results == [3]  # nothing to filter: no extra results
+
+
+def test_default_min_score_filters_and_fetches_extra(scored_engine):
+    results = scored_engine.query("q", top_k=2)
+
+    assert [r["id"] for r in results] == ["doc-0", "doc-1"]
+    assert [r["score"] for r in results] == pytest.approx([0.8, 0.5])
+    assert scored_engine.collection.n_results == [4]
+
+    assert [r["id"] for r in scored_engine.query("q", top_k=4)] == ["doc-0", "doc-1"]